@@ -0,0 +1,21 @@
+# offline comparison of demand forecasters against the reactive rules
+# run from the project root after the monitor has recorded some usage:
+# python scripts/eval_forecast.py [db_path] [interval_seconds] [link_kbps]
+# needs pandas (and scikit-learn for the regression forecaster): pip install -r requirements.txt
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.db import DB_PATH
+from src.forecast import load_usage, evaluate
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    link_kbps = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    usage = load_usage(path, interval=interval)
+    if usage.empty:
+        print(f"No usage recorded in {path}")
+        sys.exit(1)
+
+    print(f"{len(usage)} intervals, {len(usage.columns)} devices")
+    print(evaluate(usage, interval=interval, link_kbps=link_kbps).round(1).to_string())
@@ -0,0 +1,57 @@
+import math
+
+
+def classify_demand(demand, high_threshold, low_threshold):
+    if demand < high_threshold:
+        return 1
+    elif demand > low_threshold:
+        return 3
+    return 2
+
+
+def calculate_stats(data):
+    if not data:
+        return 0, 0
+    avg = sum(data) / len(data)
+    if len(data) < 2:
+        return avg, 0
+    variance = sum([(x - avg) ** 2 for x in data]) / len(data)
+    stdev = math.sqrt(variance)
+    return avg, stdev
+
+
+def decide_priority(ip, current_pr, hist, recent_priorities, high_threshold, low_threshold, predicted=None, log=None):
+    # one smart-allocator step for a device; shared by Monitor and the offline replay
+    log = log or (lambda level, message: None)
+    recent = hist[-1]
+
+    new_pr = classify_demand(recent, high_threshold, low_threshold)
+
+    if predicted is not None:
+        predicted_pr = classify_demand(max(recent, predicted), high_threshold, low_threshold)
+        if predicted_pr > new_pr:
+            new_pr = predicted_pr
+            if predicted_pr != current_pr:
+                log("DEBUG", f"Forecast pre-shaping {ip} predicted={int(predicted)} recent={recent}")
+
+    if len(hist) >= 5:
+        avg, stdev = calculate_stats(hist[:-1])
+        anomaly_threshold = avg + (2 * stdev)
+
+        if recent > anomaly_threshold and avg > high_threshold:
+            new_pr = 3
+            log("ALERT", f"Anomaly detected (2σ spike) {ip} avg={int(avg)} stdev={int(stdev)} recent={recent}")
+
+    if new_pr != current_pr:
+        recent_priorities.append(new_pr)
+
+        if new_pr < current_pr:
+            counts = recent_priorities.count(new_pr)
+            if counts < 2 and len(recent_priorities) == 3:
+                new_pr = current_pr
+                log("DEBUG", f"Holding priority for {ip} at {current_pr} (Hysteresis)")
+
+    if new_pr != current_pr:
+        recent_priorities.clear()
+
+    return new_pr
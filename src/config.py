@@ -26,6 +26,16 @@ AUTO_THRESHOLDS = {
     "anomaly_spike_factor": 5
 }
 
+FORECAST = {
+    "enabled": True,
+    "method": "holt",          # naive | ewma | holt | regression
+    "alpha": 0.5,              # level smoothing (ewma, holt)
+    "beta": 0.3,               # trend smoothing (holt)
+    "lags": 5,                 # past samples fed to the regression model
+
+    "link_capacity_kbps": 100000   # uplink size used by the offline evaluation
+}
+
 def load_auto_mode():
     from .db import get_config
     global AUTO_MODE
@@ -0,0 +1,284 @@
+import math
+import sqlite3
+from collections import defaultdict, deque
+from .allocator import classify_demand, decide_priority
+from .config import AUTO_THRESHOLDS, FORECAST, PRIORITY_BANDWIDTH
+from .db import DB_PATH
+
+USE_SKLEARN = False
+try:
+    from sklearn.linear_model import SGDRegressor
+    USE_SKLEARN = True
+except Exception:
+    USE_SKLEARN = False
+
+
+METHODS = ("naive", "ewma", "holt", "regression")
+
+
+class NaiveForecaster:
+    """Next interval looks like the last one (what the reactive rules assume)."""
+
+    def __init__(self):
+        self.last = None
+
+    def update(self, value):
+        self.last = value
+
+    def predict(self):
+        return self.last or 0
+
+
+class EWMAForecaster:
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.level = None
+
+    def update(self, value):
+        if self.level is None:
+            self.level = float(value)
+        else:
+            self.level = self.alpha * value + (1 - self.alpha) * self.level
+
+    def predict(self):
+        return max(0.0, self.level or 0.0)
+
+
+class HoltForecaster:
+    """Holt-Winters double exponential smoothing (level + trend, no seasonal term)."""
+
+    def __init__(self, alpha=0.5, beta=0.3):
+        self.alpha = alpha
+        self.beta = beta
+        self.level = None
+        self.trend = 0.0
+        self.last = None
+        self.prev = None
+
+    def update(self, value):
+        self.prev, self.last = self.last, float(value)
+        if self.level is None:
+            self.level = float(value)
+            return
+        prev_level = self.level
+        self.level = self.alpha * value + (1 - self.alpha) * (self.level + self.trend)
+        self.trend = self.beta * (self.level - prev_level) + (1 - self.beta) * self.trend
+
+    def predict(self):
+        if self.level is None:
+            return 0.0
+        # cap at the straight-line extension of the last two samples so the
+        # trend cannot overshoot a step that has already levelled off
+        ceiling = self.last + max(0.0, self.last - (self.prev if self.prev is not None else self.last))
+        return max(0.0, min(self.level + self.trend, ceiling))
+
+
+class RegressionForecaster:
+    """Linear model on the last `lags` samples, trained one step at a time with partial_fit."""
+
+    # samples scaled by low_threshold and clipped, so bursts cannot destabilise SGD;
+    # falls back to the last sample until fitted or when the output is not finite
+
+    MAX_SCALED = 4.0
+
+    def __init__(self, lags=5, scale=None):
+        self.lags = lags
+        self.scale = float(scale or AUTO_THRESHOLDS.get("low_threshold", 500000))
+        self.window = deque(maxlen=lags)
+        self.model = SGDRegressor(learning_rate="invscaling", eta0=0.01) if USE_SKLEARN else None
+        self.fitted = False
+
+    def _scaled(self, value):
+        return min(max(value / self.scale, 0.0), self.MAX_SCALED)
+
+    def _features(self):
+        return [[self._scaled(v) for v in self.window]]
+
+    def update(self, value):
+        if self.model is not None and len(self.window) == self.lags:
+            self.model.partial_fit(self._features(), [self._scaled(value)])
+            self.fitted = True
+        self.window.append(value)
+
+    def predict(self):
+        if not self.window:
+            return 0.0
+        last = float(self.window[-1])
+        if not self.fitted or len(self.window) < self.lags:
+            return last
+        value = float(self.model.predict(self._features())[0])
+        if not math.isfinite(value):
+            return last
+        return min(max(value, 0.0), self.MAX_SCALED) * self.scale
+
+
+def make_forecaster(method=None, settings=None):
+    settings = settings or FORECAST
+    method = method or settings.get("method", "holt")
+    if method == "naive":
+        return NaiveForecaster()
+    if method == "ewma":
+        return EWMAForecaster(alpha=settings.get("alpha", 0.5))
+    if method == "holt":
+        return HoltForecaster(alpha=settings.get("alpha", 0.5), beta=settings.get("beta", 0.3))
+    if method == "regression":
+        return RegressionForecaster(lags=int(settings.get("lags", 5)))
+    raise ValueError(f"Unknown forecast method: {method}")
+
+
+class DemandForecaster:
+    """Keeps one forecaster per device and predicts its next-interval byte total."""
+
+    def __init__(self, method=None):
+        self.method = method or FORECAST.get("method", "holt")
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown forecast method: {self.method}")
+        self.models = defaultdict(lambda: make_forecaster(self.method))
+
+    def observe(self, ip, total):
+        self.models[ip].update(total)
+
+    def reset(self, ip):
+        self.models.pop(ip, None)
+
+    def prune(self, keep):
+        for ip in list(self.models):
+            if ip not in keep:
+                del self.models[ip]
+
+    def predict(self, ip):
+        if ip not in self.models:
+            return 0.0
+        return self.models[ip].predict()
+
+
+def load_usage(path=DB_PATH, interval=2.0, gap_factor=3):
+    """Read the usage table into a (session, flush) x ip matrix of bytes per interval."""
+    # rows less than interval/2 apart belong to one flush; a gap over gap_factor intervals is a restart
+    import pandas as pd
+
+    conn = sqlite3.connect(path)
+    df = pd.read_sql_query("SELECT ip,ts,bytes_rx,bytes_tx FROM usage ORDER BY ts", conn)
+    conn.close()
+    if df.empty:
+        return pd.DataFrame()
+
+    gaps = df["ts"].diff().fillna(0)
+    df["total"] = df["bytes_rx"] + df["bytes_tx"]
+    df["flush"] = (gaps > interval / 2).cumsum()
+    df["session"] = (gaps > gap_factor * interval).cumsum()
+    return df.pivot_table(index=["session", "flush"], columns="ip", values="total", aggfunc="sum").fillna(0)
+
+
+def _sessions(usage):
+    if "session" in usage.index.names:
+        return [session.droplevel("session") for _, session in usage.groupby(level="session")]
+    return [usage]
+
+
+def _cap_bytes(priority, interval):
+    kbps = PRIORITY_BANDWIDTH.get(priority, 20000)
+    return kbps * 1000 / 8 * interval
+
+
+def _replay(usage, method, interval, link_bytes, high_threshold, low_threshold):
+    """Replay recorded demand through the smart allocator: None (unshaped), "reactive" or a forecaster."""
+    priorities = {ip: 2 for ip in usage.columns}
+    hists = {ip: deque(maxlen=10) for ip in usage.columns}
+    held = {ip: deque(maxlen=3) for ip in usage.columns}
+    preshaped = {ip: False for ip in usage.columns}
+    models = {ip: make_forecaster(method) for ip in usage.columns} if method not in (None, "reactive") else {}
+    result = {"saturated": 0, "throttled": 0.0, "needless_preshape": 0}
+
+    for _, row in usage.iterrows():
+        if method is None:
+            load = row.sum()
+        else:
+            load = 0.0
+            for ip in usage.columns:
+                cap = _cap_bytes(priorities[ip], interval)
+                load += min(row[ip], cap)
+                result["throttled"] += max(0.0, row[ip] - cap)
+                # forecast raised this tick's priority but demand stayed below its threshold
+                if preshaped[ip] and classify_demand(row[ip], high_threshold, low_threshold) < priorities[ip]:
+                    result["needless_preshape"] += 1
+        if load > link_bytes:
+            result["saturated"] += 1
+
+        if method is None:
+            continue
+
+        for ip in usage.columns:
+            demand = row[ip]
+            hists[ip].append(demand)
+            predicted = None
+            if ip in models:
+                models[ip].update(demand)
+                predicted = models[ip].predict()
+
+            reactive_pr = classify_demand(demand, high_threshold, low_threshold)
+            priorities[ip] = decide_priority(ip, priorities[ip], list(hists[ip]), held[ip],
+                                             high_threshold, low_threshold, predicted=predicted)
+            preshaped[ip] = (predicted is not None and priorities[ip] > reactive_pr
+                             and classify_demand(max(demand, predicted), high_threshold, low_threshold) > reactive_pr)
+
+    return result
+
+
+def _forecast_error(usage, method):
+    errors = []
+    actuals = []
+    for ip in usage.columns:
+        model = make_forecaster(method)
+        for i, value in enumerate(usage[ip]):
+            if i > 0:
+                errors.append(model.predict() - value)
+                actuals.append(value)
+            model.update(value)
+    return errors, actuals
+
+
+def _error_metrics(errors, actuals):
+    if not errors:
+        return {"mae": 0.0, "rmse": 0.0, "mape": 0.0}
+    mae = sum(abs(e) for e in errors) / len(errors)
+    rmse = math.sqrt(sum(e * e for e in errors) / len(errors))
+    nonzero = [(e, a) for e, a in zip(errors, actuals) if a]
+    mape = 100 * sum(abs(e) / a for e, a in nonzero) / len(nonzero) if nonzero else 0.0
+    return {"mae": mae, "rmse": rmse, "mape": mape}
+
+
+def evaluate(usage, methods=("ewma", "holt", "regression"), interval=2.0, link_kbps=None):
+    """Forecast error, saturation time and shaping cost per policy; reactive carries the naive forecast error."""
+    import pandas as pd
+
+    link_kbps = link_kbps or FORECAST.get("link_capacity_kbps", 100000)
+    link_bytes = link_kbps * 1000 / 8 * interval
+    high_threshold = int(AUTO_THRESHOLDS.get("high_threshold", 200000))
+    low_threshold = int(AUTO_THRESHOLDS.get("low_threshold", 1000000))
+    sessions = _sessions(usage)
+    ticks = max(1, len(usage))
+
+    rows = []
+    for policy in (None, "reactive") + tuple(m for m in methods if m != "naive"):
+        totals = {"saturated": 0, "throttled": 0.0, "needless_preshape": 0}
+        errors, actuals = [], []
+        for session in sessions:
+            for key, value in _replay(session, policy, interval, link_bytes, high_threshold, low_threshold).items():
+                totals[key] += value
+            if policy:
+                e, a = _forecast_error(session, "naive" if policy == "reactive" else policy)
+                errors += e
+                actuals += a
+        err = _error_metrics(errors, actuals) if policy else {}
+        rows.append({
+            "policy": policy or "unshaped",
+            "mae": err.get("mae"),
+            "rmse": err.get("rmse"),
+            "mape": err.get("mape"),
+            "saturated_s": totals["saturated"] * interval,
+            "saturated_pct": round(100 * totals["saturated"] / ticks, 1),
+            "throttled_bytes": int(totals["throttled"]),
+            "needless_preshape": totals["needless_preshape"],
+        })
+    return pd.DataFrame(rows).set_index("policy")
@@ -1,9 +1,10 @@
 import time, threading, platform
 from collections import defaultdict, deque
-import math
 from .db import insert_usage, log_event, list_devices, usage_history, set_priority
 from .shaper import set_limit
-from .config import AUTO_THRESHOLDS, load_auto_mode
+from .config import AUTO_THRESHOLDS, FORECAST, load_auto_mode
+from .allocator import decide_priority
+from .forecast import DemandForecaster
 
 USE_SCAPY = False
 try:
@@ -21,6 +22,7 @@ class Monitor:
         self._thread = None
         self.recent_totals = defaultdict(lambda: deque(maxlen=10))
         self.recent_priorities = defaultdict(lambda: deque(maxlen=3))
+        self.forecaster = DemandForecaster()
 
     def _proc(self, pkt):
         try:
@@ -48,25 +50,35 @@ class Monitor:
             self._flush()
 
     def _flush(self):
+        totals = {}
         for ip, c in list(self.counts.items()):
             total = c.get("rx", 0) + c.get("tx", 0)
             insert_usage(ip, c.get("rx", 0), c.get("tx", 0))
             self.recent_totals[ip].append(total)
+            totals[ip] = total
             self.counts[ip] = {"rx": 0, "tx": 0}
 
+        if FORECAST.get("enabled", True):
+            self._update_forecasts(totals)
+
         from . import config
         if config.AUTO_MODE:
             self._smart_allocator()
 
-    def _calculate_stats(self, data):
-        if not data:
-            return 0, 0
-        avg = sum(data) / len(data)
-        if len(data) < 2:
-            return avg, 0
-        variance = sum([(x - avg) ** 2 for x in data]) / len(data)
-        stdev = math.sqrt(variance)
-        return avg, stdev
+    def _update_forecasts(self, totals):
+        try:
+            known = {d["ip"] for d in list_devices()}
+        except Exception as e:
+            log_event("ERROR", f"Forecast update failed: {e}")
+            return
+
+        self.forecaster.prune(known)
+        for ip in known & totals.keys():
+            try:
+                self.forecaster.observe(ip, totals[ip])
+            except Exception as e:
+                log_event("ERROR", f"Forecast update failed for {ip}: {e}")
+                self.forecaster.reset(ip)
 
     def _smart_allocator(self):
         try:
@@ -87,35 +99,12 @@ class Monitor:
                     continue
 
                 hist = list(hist_deque)
-                recent = hist[-1]
-
-                if recent < high_threshold:
-                    new_pr = 1
-                elif recent > low_threshold:
-                    new_pr = 3
-                else:
-                    new_pr = 2
+                predicted = self.forecaster.predict(ip) if FORECAST.get("enabled", True) else None
 
-                if len(hist) >= 5:
-                    avg, stdev = self._calculate_stats(hist[:-1])
-                    anomaly_threshold = avg + (2 * stdev)
-
-                    if recent > anomaly_threshold and avg > high_threshold:
-                        new_pr = 3
-                        log_event("ALERT", f"Anomaly detected (2σ spike) {ip} avg={int(avg)} stdev={int(stdev)} recent={recent}")
+                new_pr = decide_priority(ip, current_pr, hist, self.recent_priorities[ip],
+                                         high_threshold, low_threshold, predicted=predicted, log=log_event)
 
                 if new_pr != current_pr:
-                    self.recent_priorities[ip].append(new_pr)
-
-                    if new_pr < current_pr:
-                        counts = self.recent_priorities[ip].count(new_pr)
-                        if counts < 2 and len(self.recent_priorities[ip]) == 3:
-                            new_pr = current_pr
-                            log_event("DEBUG", f"Holding priority for {ip} at {current_pr} (Hysteresis)")
-
-                if new_pr != current_pr:
-                    self.recent_priorities[ip].clear()
-
                     set_priority(ip, new_pr)
                     set_limit(ip, new_pr)
                     log_event("AUTO", f"Smart allocator set {ip} -> {['Blocked','High','Normal','Low'][new_pr]}")
@@ -0,0 +1,131 @@
+import math
+import random
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.forecast import (
+    DemandForecaster,
+    EWMAForecaster,
+    HoltForecaster,
+    RegressionForecaster,
+    USE_SKLEARN,
+    _replay,
+    classify_demand,
+    evaluate,
+    load_usage,
+)
+from src.db import init_db
+
+HIGH = 20000
+LOW = 500000
+
+
+def test_classify_demand():
+    assert classify_demand(HIGH - 1, HIGH, LOW) == 1
+    assert classify_demand(HIGH, HIGH, LOW) == 2
+    assert classify_demand(LOW, HIGH, LOW) == 2
+    assert classify_demand(LOW + 1, HIGH, LOW) == 3
+
+
+def test_ewma_converges_to_constant():
+    f = EWMAForecaster(alpha=0.5)
+    f.update(0)
+    for _ in range(30):
+        f.update(100000)
+    assert f.predict() == pytest.approx(100000, rel=1e-6)
+
+
+def test_holt_follows_linear_ramp():
+    f = HoltForecaster(alpha=0.5, beta=0.3)
+    for i in range(60):
+        f.update(1000 * i)
+    assert f.predict() == pytest.approx(1000 * 60, rel=0.01)
+
+
+def test_holt_does_not_overshoot_step():
+    f = HoltForecaster(alpha=0.5, beta=0.3)
+    for value in [10000] * 5 + [400000] * 10:
+        f.update(value)
+        assert f.predict() <= LOW
+    for value in [1000] * 5 + [19000] * 10:
+        f.update(value)
+    assert f.predict() < HIGH
+
+
+@pytest.mark.skipif(not USE_SKLEARN, reason="scikit-learn not installed")
+def test_regression_stays_bounded_on_bursts():
+    random.seed(0)
+    f = RegressionForecaster(lags=5, scale=LOW)
+    for _ in range(2000):
+        f.update(random.choice([5000, 20000, 6000000]))
+        p = f.predict()
+        assert math.isfinite(p)
+        assert p >= 0
+        if f.fitted:
+            assert p <= 4 * LOW
+    assert f.fitted
+    assert all(abs(c) < 10 for c in f.model.coef_)
+
+
+def test_demand_forecaster_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        DemandForecaster("arima")
+
+
+def test_demand_forecaster_reset():
+    d = DemandForecaster("ewma")
+    d.observe("10.0.0.2", 5000)
+    assert d.predict("10.0.0.2") == 5000
+    d.reset("10.0.0.2")
+    assert d.predict("10.0.0.2") == 0.0
+
+
+def test_replay_saturation_and_throttling():
+    # interval=1: Normal caps at 2.5 MB, Low at 625 kB per tick
+    usage = pd.DataFrame({"a": [100000, 3000000, 3000000, 100000]})
+
+    unshaped = _replay(usage, None, 1.0, 2000000, HIGH, LOW)
+    assert unshaped["saturated"] == 2
+    assert unshaped["throttled"] == 0
+
+    reactive = _replay(usage, "reactive", 1.0, 2000000, HIGH, LOW)
+    assert reactive["saturated"] == 1
+    assert reactive["throttled"] == pytest.approx(500000 + 3000000 - 625000)
+    assert reactive["needless_preshape"] == 0
+
+
+def test_replay_counts_needless_preshape():
+    # ramp that levels off at 480 kB: the trend predicts 503 kB once, demand never crosses
+    usage = pd.DataFrame({"a": [100000, 200000, 300000, 400000, 480000, 480000, 480000]})
+    holt = _replay(usage, "holt", 1.0, 10000000, HIGH, LOW)
+    assert holt["needless_preshape"] == 1
+
+
+def test_evaluate_rows():
+    usage = pd.DataFrame({"a": [100000, 3000000, 3000000, 100000]})
+    report = evaluate(usage, methods=("naive", "ewma", "holt"), interval=1.0, link_kbps=16000)
+    assert list(report.index) == ["unshaped", "reactive", "ewma", "holt"]
+    assert report.loc["unshaped", "saturated_s"] == 2.0
+    assert report.loc["reactive", "saturated_s"] == 1.0
+
+
+def test_load_usage_buckets_flushes_and_sessions(tmp_path):
+    path = str(tmp_path / "usage.db")
+    init_db(path)
+    conn = sqlite3.connect(path)
+    rows = [
+        ("a", 100.000, 1000), ("b", 100.003, 2000),   # one flush, two writes
+        ("a", 102.500, 3000), ("b", 102.503, 4000),   # slow flush (2.5 s period)
+        ("a", 104.600, 5000),
+        ("a", 120.000, 6000),                         # monitor restart
+    ]
+    conn.executemany("INSERT INTO usage(ip,ts,bytes_rx,bytes_tx) VALUES(?,?,?,0)", rows)
+    conn.commit()
+    conn.close()
+
+    usage = load_usage(path, interval=2.0)
+    assert list(usage.index) == [(0, 0), (0, 1), (0, 2), (1, 3)]
+    assert list(usage["a"]) == [1000, 3000, 5000, 6000]
+    assert list(usage["b"]) == [2000, 4000, 0, 0]
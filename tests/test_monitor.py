@@ -0,0 +1,79 @@
+import pytest
+
+from src import config, monitor
+from src.forecast import DemandForecaster
+
+IP = "192.168.0.5"
+
+# bursty background, then a steady ramp through low_threshold (500 kB)
+RAMP = [200000, 400000] * 5 + [430000, 460000, 490000, 520000, 550000, 580000]
+
+
+@pytest.fixture
+def mon(monkeypatch):
+    devices = {IP: 2}
+    events = []
+    monkeypatch.setattr(monitor, "insert_usage", lambda ip, rx, tx: None)
+    monkeypatch.setattr(monitor, "list_devices", lambda: [{"ip": ip, "priority": pr} for ip, pr in devices.items()])
+    monkeypatch.setattr(monitor, "set_priority", lambda ip, pr: devices.__setitem__(ip, pr))
+    monkeypatch.setattr(monitor, "set_limit", lambda ip, pr: None)
+    monkeypatch.setattr(monitor, "log_event", lambda level, message: events.append((level, message)))
+    monkeypatch.setattr(config, "AUTO_MODE", True)
+    monkeypatch.setitem(config.FORECAST, "enabled", True)
+
+    m = monitor.Monitor()
+    m.forecaster = DemandForecaster("holt")
+    m.devices = devices
+    m.events = events
+    return m
+
+
+def _run(m, series):
+    priorities = []
+    for value in series:
+        m.counts[IP]["rx"] = value
+        m._flush()
+        priorities.append(m.devices[IP])
+    return priorities
+
+
+def test_forecast_shapes_ramp_one_tick_earlier(mon):
+    assert _run(mon, RAMP).index(3) == 12
+
+
+def test_forecast_disabled_is_reactive(mon, monkeypatch):
+    monkeypatch.setitem(config.FORECAST, "enabled", False)
+    assert _run(mon, RAMP).index(3) == 13
+    assert not mon.forecaster.models
+
+
+def test_step_below_threshold_is_not_preshaped(mon, monkeypatch):
+    # the 2σ rule may flag the step itself; the forecast must not add anything on top
+    step = [10000] * 5 + [400000] * 10
+    forecast = _run(mon, step)
+    assert not any("Forecast pre-shaping" in message for _, message in mon.events)
+
+    monkeypatch.setitem(config.FORECAST, "enabled", False)
+    mon.devices[IP] = 2
+    mon.recent_totals.clear()
+    mon.recent_priorities.clear()
+    assert _run(mon, step) == forecast
+
+
+def test_observe_failure_is_logged_and_model_reset(mon):
+    _run(mon, [100000])
+    assert IP in mon.forecaster.models
+
+    def fail(ip, total):
+        raise ValueError("boom")
+
+    mon.forecaster.observe = fail
+    _run(mon, [100000])
+    assert ("ERROR", f"Forecast update failed for {IP}: boom") in mon.events
+    assert IP not in mon.forecaster.models
+
+
+def test_only_known_devices_are_forecast(mon):
+    mon.counts["8.8.8.8"]["rx"] = 5000
+    _run(mon, [100000])
+    assert set(mon.forecaster.models) == {IP}